@@ -1,49 +1,124 @@
 import os
+import re
+import asyncio
+import hmac
+import json
+import hashlib
+import queue
 import logging
-from typing import Dict, Any, Optional
-from fastapi import FastAPI, HTTPException, Depends, status
+from logging.handlers import QueueHandler, QueueListener
+from time import perf_counter
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Extra, Field
 import uvicorn
-from gradio_client import Client, handle_file
-import asyncio
-from functools import lru_cache
+import httpx
+import redis.asyncio as aioredis
+from redis import RedisError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Environment variables
+API_KEY = os.getenv("API_KEY", "your-secure-api-key-here")
+REQUIRE_API_KEY = os.getenv("REQUIRE_API_KEY", "false").lower() == "true"
+HUGGINGFACE_SPACE = os.getenv("HUGGINGFACE_SPACE", "Abdhack/medgemma-4b-it")
+HF_TOKEN = os.getenv("HF_TOKEN")  # Optional: for private spaces or rate limiting
+REDIS_URL = os.getenv("REDIS_URL")  # Optional: enables the shared response cache
+CACHE_TTL = int(os.getenv("CACHE_TTL", 3600))
+CACHE_TIMEOUT = float(os.getenv("CACHE_TIMEOUT", 1))  # Seconds before a slow Redis counts as a cache miss
+ALLOWED_ORIGINS = tuple(origin.strip() for origin in os.getenv("ALLOWED_ORIGINS", "*").split(",") if origin.strip())
+
+# Public URL of the Space, e.g. Abdhack/medgemma-4b-it -> https://abdhack-medgemma-4b-it.hf.space
+SPACE_URL = "https://" + HUGGINGFACE_SPACE.lower().replace("/", "-").replace("_", "-").replace(".", "-") + ".hf.space"
+# Gradio API route for the Space's chat function (relative to SPACE_URL)
+CHAT_PATH = "/gradio_api/call/chat"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared HTTP client for the Hugging Face Space and close it on shutdown"""
+    # Route log records through a queue so handler I/O happens on a background thread, not the event loop
+    root_logger = logging.getLogger()
+    log_handlers = root_logger.handlers[:]
+    log_queue = queue.Queue(-1)
+    log_listener = QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+    root_logger.handlers = [QueueHandler(log_queue)]
+    log_listener.start()
+
+    # Base URL and auth header are set once on the client instead of per request
+    app.state.http = httpx.AsyncClient(
+        base_url=SPACE_URL,
+        headers={"Authorization": f"Bearer {HF_TOKEN}"} if HF_TOKEN else None,
+        http2=True,
+        timeout=httpx.Timeout(120, connect=5),
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=50)
+    )
+    logger.info("HTTP client initialized for space: %s", HUGGINGFACE_SPACE)
+
+    # Warm up the connection pool so the first query doesn't pay for the TCP/TLS handshake;
+    # best effort with a short timeout so a sleeping Space can't hold up startup
+    try:
+        await app.state.http.head("/", timeout=5)
+        logger.info("Connection to Hugging Face Space warmed up")
+    except httpx.HTTPError as e:
+        logger.warning("Could not warm up connection to Hugging Face Space: %s", e)
+
+    # Response cache is only enabled when a Redis URL is configured
+    app.state.cache = aioredis.from_url(
+        REDIS_URL,
+        socket_connect_timeout=CACHE_TIMEOUT,
+        socket_timeout=CACHE_TIMEOUT
+    ) if REDIS_URL else None
+    if app.state.cache is not None:
+        logger.info("Response cache enabled")
+
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+        if app.state.cache is not None:
+            await app.state.cache.aclose()
+        log_listener.stop()
+        root_logger.handlers = log_handlers
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Medical AI Service",
-    description="Python service for MedGemma-4B-IT medical AI queries via Gradio Client",
-    version="1.0.0"
+    description="Python service for MedGemma-4B-IT medical AI queries via the Hugging Face Space API",
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
+# Credentials are only allowed with an explicit origin list; the "*" default keeps
+# Starlette on its static-header path instead of echoing each request's Origin
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify your Supabase domain
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=ALLOWED_ORIGINS,  # In production, set ALLOWED_ORIGINS to your Supabase domain
+    allow_credentials="*" not in ALLOWED_ORIGINS,
+    allow_methods=("GET", "POST", "OPTIONS"),
+    allow_headers=("Authorization", "Content-Type"),
 )
 
 # Security
 security = HTTPBearer(auto_error=False)
 
-# Environment variables
-API_KEY = os.getenv("API_KEY", "your-secure-api-key-here")
-HUGGINGFACE_SPACE = os.getenv("HUGGINGFACE_SPACE", "Abdhack/medgemma-4b-it")
-HF_TOKEN = os.getenv("HF_TOKEN")  # Optional: for private spaces or rate limiting
-
 # Pydantic models
 class MessageInput(BaseModel):
     text: str = Field(..., description="The medical query text")
-    files: list = Field(default=[], description="List of file paths (currently not used)")
+    files: Tuple[str, ...] = Field(default=(), description="List of file paths (currently not used)")
 
 class MedGemmaRequest(BaseModel):
+    class Config:
+        # Reject unknown fields
+        extra = Extra.forbid
+    
     message: MessageInput
     system_prompt: str = Field(
         default="You are a helpful medical expert. Provide accurate, evidence-based medical information while emphasizing the importance of consulting healthcare professionals for diagnosis and treatment.",
@@ -65,46 +140,117 @@ class HealthResponse(BaseModel):
     version: str
     gradio_space: str
 
-# Global client instance
-gradio_client = None
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """Return the shared HTTP client created in the lifespan handler"""
+    return request.app.state.http
 
-@lru_cache()
-def get_gradio_client():
-    """Get or create Gradio client instance with caching"""
-    global gradio_client
-    if gradio_client is None:
-        try:
-            logger.info(f"Initializing Gradio client for space: {HUGGINGFACE_SPACE}")
-            
-            # Initialize client with optional HF token
-            if HF_TOKEN:
-                gradio_client = Client(HUGGINGFACE_SPACE, hf_token=HF_TOKEN)
-                logger.info("Gradio client initialized with HF token")
-            else:
-                gradio_client = Client(HUGGINGFACE_SPACE)
-                logger.info("Gradio client initialized without HF token")
-                
-        except Exception as e:
-            logger.error(f"Failed to initialize Gradio client: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail=f"Failed to connect to AI service: {str(e)}"
-            )
+async def submit_chat(http: httpx.AsyncClient, request: MedGemmaRequest) -> str:
+    """Queue a /chat prediction on the Space and return its event id"""
+    # Prepare the request for the Gradio API
+    message_dict = {
+        "text": request.message.text,
+        "files": request.message.files  # Currently empty for text-only queries
+    }
+    
+    response = await http.post(
+        CHAT_PATH,
+        json={"data": [message_dict, request.system_prompt, request.max_tokens]}
+    )
+    response.raise_for_status()
+    return response.json()["event_id"]
+
+async def iter_chat_events(http: httpx.AsyncClient, event_id: str) -> AsyncIterator[Tuple[str, Any]]:
+    """Yield (event, data) pairs from the Space's event stream until the job completes or fails"""
+    event = None
+    async with http.stream("GET", f"{CHAT_PATH}/{event_id}") as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:") and event != "heartbeat":
+                payload = line[len("data:"):].strip()
+                data = json.loads(payload) if payload else None
+                if event == "error":
+                    raise RuntimeError(f"AI service error: {data}")
+                yield event, data
+                if event == "complete":
+                    return
+    
+    # The stream closed early (Space crash, restart or proxy cut); the last output is only partial
+    raise RuntimeError("AI service stream ended before completion")
+
+async def predict_chat(http: httpx.AsyncClient, request: MedGemmaRequest) -> Any:
+    """Run a /chat prediction on the Space and return its final output"""
+    event_id = await submit_chat(http, request)
+    
+    result = None
+    async for event, data in iter_chat_events(http, event_id):
+        if data:
+            result = data[0]
+    return result
+
+# Space predictions currently running, keyed by query cache key, so that
+# concurrent identical queries share a single upstream call
+_inflight: Dict[str, "asyncio.Future[Any]"] = {}
+
+async def coalesced_predict_chat(http: httpx.AsyncClient, request: MedGemmaRequest, key: str) -> Any:
+    """Run predict_chat, joining an identical prediction that is already in flight"""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(predict_chat(http, request))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    else:
+        logger.info("Joining in-flight request for identical query")
     
-    return gradio_client
+    # Shield the shared prediction so one caller disconnecting doesn't cancel it for the others
+    return await asyncio.shield(task)
+
+def get_cache(request: Request) -> Optional[aioredis.Redis]:
+    """Return the Redis response cache, or None when caching is disabled"""
+    return request.app.state.cache
+
+def query_cache_key(request: MedGemmaRequest) -> str:
+    """Build a cache key from the inputs that determine the model output (not the caller)"""
+    inputs = [request.message.text, request.message.files, request.system_prompt, request.max_tokens]
+    digest = hashlib.sha256(json.dumps(inputs).encode()).hexdigest()
+    return f"medgemma:query:{digest}"
+
+async def get_cached_response(cache: Optional[aioredis.Redis], key: str) -> Optional[Dict[str, Any]]:
+    """Look up a cached response; cache failures are logged and treated as a miss"""
+    if cache is None:
+        return None
+    try:
+        cached = await cache.get(key)
+    except RedisError as e:
+        logger.warning("Response cache lookup failed: %s", e)
+        return None
+    return json.loads(cached) if cached else None
+
+async def set_cached_response(cache: Optional[aioredis.Redis], key: str, payload: Dict[str, Any]) -> None:
+    """Store a successful response; cache failures are logged and ignored"""
+    if cache is None:
+        return
+    try:
+        await cache.set(key, json.dumps(payload), ex=CACHE_TTL)
+    except RedisError as e:
+        logger.warning("Response cache update failed: %s", e)
+
+# Encoded once for constant-time comparison in verify_api_key
+_API_KEY_BYTES = API_KEY.encode()
 
 def verify_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Verify API key if provided"""
     if credentials is None:
         # Allow requests without API key for development
-        if os.getenv("REQUIRE_API_KEY", "false").lower() == "true":
+        if REQUIRE_API_KEY:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="API key required"
             )
         return None
     
-    if credentials.credentials != API_KEY:
+    if not hmac.compare_digest(credentials.credentials.encode(), _API_KEY_BYTES):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key"
@@ -123,11 +269,12 @@ async def root():
     )
 
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(http: httpx.AsyncClient = Depends(get_http_client)):
     """Detailed health check endpoint"""
     try:
-        # Test Gradio client connection
-        client = get_gradio_client()
+        # Make sure the shared HTTP client is still usable
+        if http.is_closed:
+            raise RuntimeError("HTTP client is closed")
         
         return HealthResponse(
             status="healthy",
@@ -136,7 +283,7 @@ async def health_check():
             gradio_space=HUGGINGFACE_SPACE
         )
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}")
+        logger.error("Health check failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=f"Service unhealthy: {str(e)}"
@@ -145,55 +292,47 @@ async def health_check():
 @app.post("/query-medgemma", response_model=MedGemmaResponse)
 async def query_medgemma(
     request: MedGemmaRequest,
-    api_key: Optional[str] = Depends(verify_api_key)
+    api_key: Optional[str] = Depends(verify_api_key),
+    http: httpx.AsyncClient = Depends(get_http_client),
+    cache: Optional[aioredis.Redis] = Depends(get_cache)
 ):
     """
-    Query the MedGemma-4B-IT model via Gradio Client
+    Query the MedGemma-4B-IT model via the Hugging Face Space API
     """
-    import time
-    start_time = time.time()
+    start_time = perf_counter()
     
     try:
-        logger.info(f"Processing medical query for user: {request.user_id}")
-        logger.info(f"Query text length: {len(request.message.text)} characters")
-        
-        # Get Gradio client
-        client = get_gradio_client()
-        
-        # Prepare the request for Gradio
-        message_dict = {
-            "text": request.message.text,
-            "files": request.message.files  # Currently empty for text-only queries
-        }
-        
-        logger.info("Sending request to Gradio client...")
+        logger.info("Processing medical query for user: %s", request.user_id)
+        logger.info("Query text length: %s characters", len(request.message.text))
         
-        # Make the prediction using the Gradio client
-        # Based on the API specification you provided
-        result = await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: client.predict(
-                message=message_dict,
-                param_2=request.system_prompt,  # System prompt
-                param_3=request.max_tokens,     # Max tokens
-                api_name="/chat"
+        # Serve repeated questions from the response cache
+        cache_key = query_cache_key(request)
+        cached = await get_cached_response(cache, cache_key)
+        if cached is not None:
+            logger.info("Serving cached response for user: %s", request.user_id)
+            return MedGemmaResponse(
+                response=cached["response"],
+                confidence=cached["confidence"],
+                source="medgemma-4b-it-gradio",
+                processing_time=perf_counter() - start_time,
+                user_id=request.user_id
             )
-        )
         
-        processing_time = time.time() - start_time
-        logger.info(f"Gradio client response received in {processing_time:.2f} seconds")
+        logger.info("Sending request to Hugging Face Space...")
         
-        # Extract response text
-        response_text = str(result) if result else "No response generated"
+        # Make the prediction through the Space's /chat endpoint
+        result = await coalesced_predict_chat(http, request, cache_key)
         
-        # Calculate confidence score (simplified heuristic)
-        confidence = calculate_confidence_score(response_text, request.message.text)
+        processing_time = perf_counter() - start_time
+        logger.info("Space response received in %.2f seconds", processing_time)
         
-        # Add medical disclaimer if not present
-        if not contains_medical_disclaimer(response_text):
-            response_text = add_medical_disclaimer(response_text)
+        response_text, confidence = finalize_response(result, request.message.text)
         
-        logger.info(f"Successfully processed query for user: {request.user_id}")
+        # Don't share the "No response generated" placeholder with other users
+        if result:
+            await set_cached_response(cache, cache_key, {"response": response_text, "confidence": confidence})
+        
+        logger.info("Successfully processed query for user: %s", request.user_id)
         
         return MedGemmaResponse(
             response=response_text,
@@ -204,18 +343,106 @@ async def query_medgemma(
         )
         
     except Exception as e:
-        processing_time = time.time() - start_time
-        logger.error(f"Error processing medical query: {str(e)}")
-        logger.error(f"Error occurred after {processing_time:.2f} seconds")
+        processing_time = perf_counter() - start_time
+        logger.error("Error processing medical query: %s", e)
+        logger.error("Error occurred after %.2f seconds", processing_time)
         
         # Return a graceful error response
-        return MedGemmaResponse(
-            response=f"I apologize, but I encountered an error processing your medical query: {str(e)}. Please try again later or consult with a healthcare professional for immediate assistance.",
-            confidence=0.0,
-            source="error-fallback",
+        return ORJSONResponse(error_fallback_body(e, processing_time, request.user_id))
+
+def sse_event(event: str, data: Any) -> str:
+    """Format a server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_medgemma(
+    request: MedGemmaRequest,
+    http: httpx.AsyncClient,
+    cache: Optional[aioredis.Redis]
+) -> AsyncIterator[str]:
+    """
+    Relay the model output as 'chunk' events carrying newly generated text, then send
+    the full MedGemmaResponse (with disclaimer and confidence) as a 'complete' event.
+    The 'complete' payload is authoritative; failures are sent as an 'error' event.
+    """
+    start_time = perf_counter()
+    
+    try:
+        logger.info("Streaming medical query for user: %s", request.user_id)
+        
+        cache_key = query_cache_key(request)
+        cached = await get_cached_response(cache, cache_key)
+        if cached is not None:
+            logger.info("Serving cached response for user: %s", request.user_id)
+            response_text, confidence = cached["response"], cached["confidence"]
+        else:
+            event_id = await submit_chat(http, request)
+            
+            # Gradio sends the cumulative output on every update, so only forward the new suffix
+            result = None
+            async for event, data in iter_chat_events(http, event_id):
+                if not data:
+                    continue
+                output = data[0]
+                if isinstance(output, str):
+                    previous = result if isinstance(result, str) else ""
+                    if output.startswith(previous) and len(output) > len(previous):
+                        yield sse_event("chunk", {"text": output[len(previous):]})
+                result = output
+            
+            response_text, confidence = finalize_response(result, request.message.text)
+            # Same rule as /query-medgemma: never cache the empty-result placeholder
+            if result:
+                await set_cached_response(cache, cache_key, {"response": response_text, "confidence": confidence})
+        
+        processing_time = perf_counter() - start_time
+        logger.info("Streamed query for user %s in %.2f seconds", request.user_id, processing_time)
+        
+        yield sse_event("complete", MedGemmaResponse(
+            response=response_text,
+            confidence=confidence,
+            source="medgemma-4b-it-gradio",
             processing_time=processing_time,
             user_id=request.user_id
-        )
+        ).dict())
+        
+    except Exception as e:
+        processing_time = perf_counter() - start_time
+        logger.error("Error streaming medical query: %s", e)
+        yield sse_event("error", error_fallback_body(e, processing_time, request.user_id))
+
+@app.post("/query-medgemma/stream")
+async def query_medgemma_stream(
+    request: MedGemmaRequest,
+    api_key: Optional[str] = Depends(verify_api_key),
+    http: httpx.AsyncClient = Depends(get_http_client),
+    cache: Optional[aioredis.Redis] = Depends(get_cache)
+):
+    """
+    Stream the MedGemma-4B-IT answer as server-sent events
+    """
+    # Ask reverse proxies (e.g. nginx, Render's front end) not to buffer the event stream
+    return StreamingResponse(
+        stream_medgemma(request, http, cache),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Responses shorter than this get a confidence of 0.0 without being scored
+MIN_SCORED_RESPONSE_LENGTH = 32
+
+# Precompiled case-insensitive term lookups used to score and check responses
+_MED_TERMS_RE = re.compile(
+    "symptom|diagnosis|treatment|medication|doctor|physician|medical|health|condition|disease",
+    re.IGNORECASE
+)
+_CAUTION_RE = re.compile("disclaimer|consult", re.IGNORECASE)
+_DISCLAIMER_RE = re.compile(
+    "disclaimer|consult|healthcare professional|medical advice|professional medical|seek medical",
+    re.IGNORECASE
+)
+
+# Appended to responses that don't already include their own disclaimer
+_DISCLAIMER = "\n\n⚠️ **Medical Disclaimer**: This information is for educational purposes only and should not replace professional medical advice. Please consult with a healthcare provider for medical concerns."
 
 def calculate_confidence_score(response: str, query: str) -> float:
     """
@@ -230,18 +457,12 @@ def calculate_confidence_score(response: str, query: str) -> float:
         if len(response) > 200:
             confidence += 0.2
         
-        # Responses with medical terms might be more relevant
-        medical_terms = [
-            'symptom', 'diagnosis', 'treatment', 'medication', 'doctor', 
-            'physician', 'medical', 'health', 'condition', 'disease'
-        ]
-        
-        response_lower = response.lower()
-        medical_term_count = sum(1 for term in medical_terms if term in response_lower)
+        # Responses with medical terms might be more relevant (each distinct term counts once)
+        medical_term_count = len({term.lower() for term in _MED_TERMS_RE.findall(response)})
         confidence += min(medical_term_count * 0.05, 0.3)
         
         # Responses with disclaimers show appropriate caution
-        if 'disclaimer' in response_lower or 'consult' in response_lower:
+        if _CAUTION_RE.search(response):
             confidence += 0.1
         
         # Cap confidence at reasonable maximum
@@ -252,50 +473,98 @@ def calculate_confidence_score(response: str, query: str) -> float:
 
 def contains_medical_disclaimer(text: str) -> bool:
     """Check if the response already contains a medical disclaimer"""
-    text_lower = text.lower()
-    disclaimer_keywords = [
-        'disclaimer', 'consult', 'healthcare professional', 
-        'medical advice', 'professional medical', 'seek medical'
-    ]
-    return any(keyword in text_lower for keyword in disclaimer_keywords)
+    return _DISCLAIMER_RE.search(text) is not None
 
 def add_medical_disclaimer(text: str) -> str:
     """Add a medical disclaimer to the response"""
-    disclaimer = "\n\n⚠️ **Medical Disclaimer**: This information is for educational purposes only and should not replace professional medical advice. Please consult with a healthcare provider for medical concerns."
-    return text + disclaimer
+    return text + _DISCLAIMER
+
+def finalize_response(result: Any, query: str) -> Tuple[str, float]:
+    """Turn the raw Space output into the final response text and its confidence score"""
+    # Extract response text (Gradio text outputs are usually strings already)
+    if not result:
+        response_text = "No response generated"
+    elif isinstance(result, str):
+        response_text = result
+    else:
+        response_text = str(result)
+    
+    # Calculate confidence score (simplified heuristic); empty or near-empty responses aren't worth scanning
+    if len(response_text) < MIN_SCORED_RESPONSE_LENGTH:
+        confidence = 0.0
+    else:
+        confidence = calculate_confidence_score(response_text, query)
+    
+    # Add medical disclaimer if not present
+    if not contains_medical_disclaimer(response_text):
+        response_text = add_medical_disclaimer(response_text)
+    
+    return response_text, confidence
+
+# Fixed fields of the error-fallback body; built as a plain dict so failures skip model validation
+_ERR_TEMPLATE = {
+    "response": None,
+    "confidence": 0.0,
+    "source": "error-fallback",
+    "processing_time": 0.0,
+    "user_id": None
+}
+
+def error_fallback_body(error: Exception, processing_time: float, user_id: Optional[str]) -> Dict[str, Any]:
+    """Build the graceful response body returned when a query fails"""
+    return {
+        **_ERR_TEMPLATE,
+        "response": f"I apologize, but I encountered an error processing your medical query: {str(error)}. Please try again later or consult with a healthcare professional for immediate assistance.",
+        "processing_time": processing_time,
+        "user_id": user_id
+    }
 
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
-    logger.error(f"HTTP exception: {exc.detail}")
-    return {
-        "response": f"Service error: {exc.detail}",
-        "confidence": 0.0,
-        "source": "service-error",
-        "processing_time": 0.0
-    }
+    logger.error("HTTP exception: %s", exc.detail)
+    return ORJSONResponse(
+        status_code=exc.status_code,
+        content={
+            "response": f"Service error: {exc.detail}",
+            "confidence": 0.0,
+            "source": "service-error",
+            "processing_time": 0.0
+        },
+        headers=exc.headers
+    )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
-    logger.error(f"Unexpected error: {str(exc)}")
-    return {
-        "response": "An unexpected error occurred. Please try again later.",
-        "confidence": 0.0,
-        "source": "unexpected-error",
-        "processing_time": 0.0
-    }
+    logger.error("Unexpected error: %s", exc)
+    return ORJSONResponse(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        content={
+            "response": "An unexpected error occurred. Please try again later.",
+            "confidence": 0.0,
+            "source": "unexpected-error",
+            "processing_time": 0.0
+        }
+    )
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
+    reload = os.getenv("ENVIRONMENT", "production") == "development"
+    # Two workers unless WEB_CONCURRENCY says otherwise (os.cpu_count() reports host cores, not the
+    # container's CPU quota); the reloader only supports a single process
+    workers = 1 if reload else int(os.getenv("WEB_CONCURRENCY", 2))
     
-    logger.info(f"Starting Medical AI Service on {host}:{port}")
-    logger.info(f"Using Hugging Face Space: {HUGGINGFACE_SPACE}")
-    logger.info(f"API Key required: {os.getenv('REQUIRE_API_KEY', 'false')}")
+    logger.info("Starting Medical AI Service on %s:%s with %s worker(s)", host, port, workers)
+    logger.info("Using Hugging Face Space: %s", HUGGINGFACE_SPACE)
+    logger.info("API Key required: %s", REQUIRE_API_KEY)
     
     uvicorn.run(
         "main:app",
         host=host,
         port=port,
-        reload=os.getenv("ENVIRONMENT", "production") == "development"
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+        reload=reload
     )
\ No newline at end of file